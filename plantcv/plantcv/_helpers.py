@@ -4,8 +4,11 @@ from plantcv.plantcv.logical_and import logical_and
 from plantcv.plantcv import fatal_error, warn
 from plantcv.plantcv import params
 
+# OpenCV versions prior to 3.2 modify the input image in findContours
+_FINDCONTOURS_MODIFIES_INPUT = tuple(int(v) for v in cv2.__version__.split(".")[:2]) < (3, 2)
 
-def _cv2_findcontours(bin_img):
+
+def _cv2_findcontours(bin_img, mode=cv2.RETR_TREE, method=cv2.CHAIN_APPROX_NONE):
     """
     Helper function for OpenCV findContours.
 
@@ -13,12 +16,19 @@ def _cv2_findcontours(bin_img):
 
     Keyword inputs:
     bin_img = Binary image (np.ndarray)
+    mode    = Contour retrieval mode (default = cv2.RETR_TREE)
+    method  = Contour approximation method (default = cv2.CHAIN_APPROX_NONE)
 
     :param bin_img: np.ndarray
+    :param mode: int
+    :param method: int
     :return contours: list
     :return hierarchy: np.array
     """
-    contours, hierarchy = cv2.findContours(np.copy(bin_img), cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)[-2:]
+    # Only copy the input image if this version of OpenCV would otherwise overwrite it
+    if _FINDCONTOURS_MODIFIES_INPUT:
+        bin_img = np.copy(bin_img)
+    contours, hierarchy = cv2.findContours(bin_img, mode, method)[-2:]
 
     return contours, hierarchy
 
@@ -121,6 +131,9 @@ def _iterate_analysis(img, labeled_mask, n_labels, label, function, **kwargs):
     function = analysis function to apply to each submask
     kwargs   = additional keyword arguments to pass to the analysis function
 
+    The submask passed to function is a buffer that is overwritten for the next label, so it is only valid during
+    the call. Analysis functions must not return or keep a reference to it (copy it if needed).
+
     :param img: np.ndarray
     :param mask: np.ndarray
     :param n_labels: int
@@ -136,11 +149,18 @@ def _iterate_analysis(img, labeled_mask, n_labels, label, function, **kwargs):
     # If the length of the labels list is not equal to the number of labels, raise an error
     if len(labels) != n_labels:
         fatal_error(f"Number of labels ({len(labels)}) does not match number of objects ({n_labels})")
-    mask_copy = np.copy(labeled_mask)
-    if len(np.unique(mask_copy)) == 2 and np.max(mask_copy) == 255:
+    # The labeled mask is only read below, so no defensive copy is needed
+    mask_copy = labeled_mask
+    # A mask with exactly two values, the larger being 255, is a binary mask of a single object.
+    # Check this with min/max reductions rather than sorting the whole image with np.unique
+    min_val, max_val = np.min(mask_copy), np.max(mask_copy)
+    if max_val == 255 and min_val < 255 and not np.any((mask_copy != min_val) & (mask_copy != 255)):
         mask_copy = np.where(mask_copy == 255, 1, 0).astype(np.uint8)
+    # Reuse a single full-frame buffer for every submask instead of allocating one per label
+    submask = np.empty(mask_copy.shape, dtype=np.uint8)
     for i in range(1, n_labels + 1):
-        submask = np.where(mask_copy == i, 255, 0).astype(np.uint8)
+        np.equal(mask_copy, i, out=submask)
+        submask *= 255
         img = function(img=img, mask=submask, label=f"{labels[i - 1]}_{i}", **kwargs)
     return img
 
@@ -160,37 +180,42 @@ def _object_composition(contours, hierarchy):
     :param hierarchy: numpy.ndarray
     :return group: numpy.ndarray
     """
-    stack = np.zeros((len(contours), 1))
-
-    for c, _ in enumerate(contours):
-        if hierarchy[0][c][2] == -1 and hierarchy[0][c][3] > -1:
-            stack[c] = 0
-        else:
-            stack[c] = 1
-
-    ids = np.where(stack == 1)[0]
-    group = np.array([], dtype=np.int32)
-    if len(ids) > 0:
-        contour_list = [contours[i] for i in ids]
-        group = np.vstack(contour_list)
+    # No objects
+    if len(contours) == 0:
+        return np.array([], dtype=np.int32)
+    # A single contour has no parent, so it is always kept
+    if len(contours) == 1:
+        return np.asarray(contours[0])
+    hier = hierarchy[0]
+    # Drop contours that have a parent but no children (innermost holes)
+    ids = np.flatnonzero(~((hier[:, 2] == -1) & (hier[:, 3] > -1)))
+    if len(ids) == 0:
+        return np.array([], dtype=np.int32)
+    group = np.concatenate([contours[i] for i in ids], axis=0)
 
     return group
 
 
-def _grayscale_to_rgb(img):
+def _grayscale_to_rgb(img, writable=True):
     """
     Convert a grayscale image to an RGB image.
 
     Inputs:
-    img = Grayscale or RGB image data
+    img      = Grayscale or RGB image data
+    writable = If False, return a read-only view of the grayscale data broadcast to three channels
+               instead of allocating a new image (default = True)
 
     Returns:
     img = RGB image data
 
     :param img: np.ndarray
+    :param writable: bool
     :return img: np.ndarray
     """
     if len(np.shape(img)) == 2:
-        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        if writable:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        else:
+            img = np.broadcast_to(img[:, :, None], img.shape + (3,))
 
     return img
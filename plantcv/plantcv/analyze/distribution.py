@@ -69,13 +69,13 @@ def _analyze_distribution(img, mask, direction="y", bin_size=100, hist_range="ab
     label            = optional label parameter, modifies the variable name of observations recorded
 
     Returns:
-    distribution_image   = histogram output
+    img              = input image, unchanged
 
     :param img: numpy.ndarray
     :param mask: numpy.ndarray
     :param bin_size: int
     :param label: str
-    :return distribution_images: list
+    :return img: numpy.ndarray
     """
     # Image not needed
     img -= 0
@@ -140,4 +140,4 @@ def _analyze_distribution(img, mask, direction="y", bin_size=100, hist_range="ab
     # Restore debug
     params.debug = debug
 
-    return mask
+    return img
@@ -72,10 +72,10 @@ def _analyze_size(img, mask, label):
     # Check is object is touching image boundaries (QC)
     in_bounds = within_frame(mask=mask, label=label)
 
-    # Convert grayscale images to color
-    img = _grayscale_to_rgb(img)
-    # Plot image
-    plt_img = np.copy(img)
+    # Convert grayscale images to color (read-only, the plotting image is a copy)
+    img = _grayscale_to_rgb(img, writable=False)
+    # Plot image (C-contiguous so OpenCV can draw on it, whatever the layout of the input)
+    plt_img = np.copy(img, order="C")
 
     # Find contours
     cnt, cnt_str = _cv2_findcontours(bin_img=mask)
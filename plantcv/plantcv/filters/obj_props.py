@@ -1,10 +1,17 @@
 # Filter objects based on calculated properties
 import os
+import hashlib
+import cv2
 import numpy as np
 from skimage.measure import label, regionprops
 from plantcv.plantcv import params, fatal_error
 from plantcv.plantcv._debug import _debug
 
+# Labeled image and measurements of the most recently filtered image, keyed by image content.
+# Only one image is cached: a call on a different image replaces it, but the last labeled image
+# (one full-frame integer array per measured property) stays in memory until then
+_measure_cache = {"key": None, "results": {}}
+
 
 def obj_props(bin_img, cut_side="upper", thresh=0, regprop="area"):
     """Detect/filter regions in a binary image based on calculated properties.
@@ -31,40 +38,151 @@ def obj_props(bin_img, cut_side="upper", thresh=0, regprop="area"):
     # Check if cut_side is valid
     if cut_side not in ("upper", "lower"):
         fatal_error("Must specify either 'upper' or 'lower' for cut_side")
-    # label connected regions
-    labeled_img = label(bin_img)
-    # measure region properties
-    obj_measures = regionprops(labeled_img)
-    # list of correct data types
-    correct_types = [np.int64, np.float64, int, float]
-    # check to see if property of interest is the right type
-    if type(getattr(obj_measures[0], regprop)) not in correct_types:
-        fatal_error(f"Property {regprop} is not an integer or float type.")
-
-    # blank mask to draw discs onto
-    filtered_mask = np.zeros(labeled_img.shape, dtype=np.uint8)
-    # Pull all values and calculate the mean
-    valueslist = []
-    # Store the list of coordinates (row,col) for the objects that pass
-    for obj in obj_measures:
-        # Object color
-        gray_val = 255
-        # Store the value of the property for each object
-        valueslist.append(getattr(obj, regprop))
-        # If it is an upper threshold, keep the objects that are above the threshold
-        if cut_side == "upper":
-            gray_val = 255 if getattr(obj, regprop) > thresh else 0
-        # If it is a lower threshold, keep the objects that are below the threshold
-        elif cut_side == "lower":
-            gray_val = 255 if getattr(obj, regprop) < thresh else 0
-        # Add the object to the filtered mask (255 if it passes, 0 if it does not)
-        filtered_mask += np.where(labeled_img == obj.label, gray_val, 0).astype(np.uint8)
+    # label connected regions and measure the property of each object (reused across calls on the same image)
+    labeled_img, obj_labels, values = _measure_objs(bin_img, regprop)
+
+    # If it is an upper threshold, keep the objects that are above the threshold
+    if cut_side == "upper":
+        passed = values > thresh
+    # If it is a lower threshold, keep the objects that are below the threshold
+    else:
+        passed = values < thresh
+    # Lookup table of labels to keep (labels are consecutive and index 0 is the background)
+    keep = np.zeros(len(obj_labels) + 1, dtype=bool)
+    keep[obj_labels[passed]] = True
+    # Render the kept objects into the filtered mask in a single pass
+    filtered_mask = np.where(keep[labeled_img], np.uint8(255), np.uint8(0))
 
     if params.debug == "plot":
-        print(f"Min value = {min(valueslist)}")
-        print(f"Max value = {max(valueslist)}")
-        print(f"Mean value = {sum(valueslist)/len(valueslist)}")
+        print(f"Min value = {values.min()}")
+        print(f"Max value = {values.max()}")
+        print(f"Mean value = {values.mean()}")
 
     _debug(visual=filtered_mask, filename=os.path.join(params.debug_outdir,
                                                        f"{params.device}_discs_mask_{regprop}_{thresh}.png"))
     return filtered_mask
+
+
+def _measure_objs(bin_img, regprop):
+    """Label connected regions and measure a region property of each object.
+
+    Results are cached for the most recently seen image so that repeated calls on the same image (e.g. a sweep over
+    threshold values) do not repeat the labeling and measurement. The cache holds a single image and is cleared
+    whenever a different image is measured.
+
+    Parameters:
+    ----------
+    bin_img : numpy.ndarray
+        Binary image containing the objects to consider.
+    regprop : str
+        Region property to measure.
+
+    Returns:
+    -------
+    labeled_img : numpy.ndarray
+        Labeled image with consecutive object labels starting at 1.
+    obj_labels : numpy.ndarray
+        Label of each measured object.
+    values : numpy.ndarray
+        Property value of each measured object.
+    """
+    bin_img = np.ascontiguousarray(bin_img)
+    key = (bin_img.shape, bin_img.dtype.str, hashlib.blake2b(bin_img, digest_size=16).digest())
+    if _measure_cache["key"] != key:
+        # Release the previous image's results before measuring the new image
+        _measure_cache["key"] = key
+        _measure_cache["results"] = {}
+    if regprop not in _measure_cache["results"]:
+        _measure_cache["results"][regprop] = _measure_objs_uncached(bin_img, regprop)
+    return _measure_cache["results"][regprop]
+
+
+def _measure_objs_uncached(bin_img, regprop):
+    """Label connected regions and measure a region property of each object, see _measure_objs.
+    """
+    # Area of 2D binary masks can be measured during labeling, skipping the full regionprops calculation.
+    # skimage.measure.label separates touching regions with different values, so masks with more than one
+    # nonzero value are left to the skimage path
+    if regprop == "area" and np.ndim(bin_img) == 2 and not _is_multivalued(bin_img):
+        # label connected regions (8-connectivity, same as skimage.measure.label for 2D images)
+        n_labels, labeled_img, stats, _ = cv2.connectedComponentsWithStats(np.uint8(bin_img > 0), connectivity=8)
+        # Row 0 of the stats table is the background
+        values = stats[1:, cv2.CC_STAT_AREA].astype(np.float64)
+        obj_labels = np.arange(1, n_labels)
+    else:
+        # label connected regions
+        labeled_img = label(bin_img)
+        # Measure simple properties directly from the labeled image when possible
+        values = _accumulated_props(labeled_img, regprop)
+        obj_labels = np.arange(1, labeled_img.max() + 1)
+    if values is None:
+        # measure region properties
+        obj_measures = regionprops(labeled_img)
+        # list of correct data types
+        correct_types = [np.int64, np.float64, int, float]
+        # check to see if property of interest is the right type
+        if type(getattr(obj_measures[0], regprop)) not in correct_types:
+            fatal_error(f"Property {regprop} is not an integer or float type.")
+        # Pull the property value for every object
+        values = np.fromiter((getattr(obj, regprop) for obj in obj_measures), dtype=np.float64,
+                             count=len(obj_measures))
+        obj_labels = np.fromiter((obj.label for obj in obj_measures), dtype=np.int64, count=len(obj_measures))
+    return labeled_img, obj_labels, values
+
+
+def _is_multivalued(bin_img):
+    """Check whether an image has more than one nonzero value.
+
+    Parameters:
+    ----------
+    bin_img : numpy.ndarray
+        Image to check.
+
+    Returns:
+    -------
+    bool
+        True if the image contains two or more distinct nonzero values.
+    """
+    max_val = np.max(bin_img)
+    return bool(np.any((bin_img != 0) & (bin_img != max_val)))
+
+
+def _accumulated_props(labeled_img, regprop):
+    """Measure a region property of every labeled object from per-label pixel sums.
+
+    Parameters:
+    ----------
+    labeled_img : numpy.ndarray
+        Labeled image with consecutive object labels starting at 1.
+    regprop : str
+        Region property to measure, "area" or "eccentricity" (2D only).
+
+    Returns:
+    -------
+    values : numpy.ndarray | None
+        Property value of objects 1..n, or None if the property cannot be accumulated this way.
+    """
+    if regprop not in ("area", "eccentricity") or (regprop == "eccentricity" and labeled_img.ndim != 2):
+        return None
+    n_labels = labeled_img.max()
+    # Coordinates and labels of the object pixels
+    coords = np.nonzero(labeled_img)
+    labels = labeled_img[coords]
+    count = np.bincount(labels, minlength=n_labels + 1)[1:].astype(np.float64)
+    if regprop == "area":
+        return count
+    # Central second moments of each object, from coordinates centered on the object centroid
+    rows = coords[0] - (np.bincount(labels, weights=coords[0], minlength=n_labels + 1)[1:] / count)[labels - 1]
+    cols = coords[1] - (np.bincount(labels, weights=coords[1], minlength=n_labels + 1)[1:] / count)[labels - 1]
+    mu_rr = np.bincount(labels, weights=rows * rows, minlength=n_labels + 1)[1:] / count
+    mu_cc = np.bincount(labels, weights=cols * cols, minlength=n_labels + 1)[1:] / count
+    mu_rc = np.bincount(labels, weights=rows * cols, minlength=n_labels + 1)[1:] / count
+    # Eigenvalues of the inertia tensor, as in skimage.measure.regionprops
+    half_trace = (mu_rr + mu_cc) / 2
+    root = np.sqrt(((mu_rr - mu_cc) / 2) ** 2 + mu_rc ** 2)
+    l1 = half_trace + root
+    l2 = np.clip(half_trace - root, 0, None)
+    ecc = np.zeros(n_labels)
+    nonzero = l1 != 0
+    ecc[nonzero] = np.sqrt(1 - l2[nonzero] / l1[nonzero])
+    return ecc
@@ -1,12 +1,47 @@
-from plantcv.plantcv.homology.acute import acute
-from plantcv.plantcv.homology.space import space
-from plantcv.plantcv.homology.starscape import starscape
-from plantcv.plantcv.homology.constella import constella
-from plantcv.plantcv.homology.constellaqc import constellaqc
-from plantcv.plantcv.homology.x_axis_pseudolandmark import x_axis_pseudolandmarks
-from plantcv.plantcv.homology.y_axis_pseudolandmarks import y_axis_pseudolandmarks
-from plantcv.plantcv.homology.landmark_reference_pt_dist import landmark_reference_pt_dist
-from plantcv.plantcv.homology.scale_features import scale_features
+import sys as _sys
+from importlib import import_module as _import_module
+from types import ModuleType as _ModuleType
+
+# Homology functions and the submodules that define them, imported on first use
+_LAZY_FUNCTIONS = {
+    "acute": "plantcv.plantcv.homology.acute",
+    "space": "plantcv.plantcv.homology.space",
+    "starscape": "plantcv.plantcv.homology.starscape",
+    "constella": "plantcv.plantcv.homology.constella",
+    "constellaqc": "plantcv.plantcv.homology.constellaqc",
+    "x_axis_pseudolandmarks": "plantcv.plantcv.homology.x_axis_pseudolandmark",
+    "y_axis_pseudolandmarks": "plantcv.plantcv.homology.y_axis_pseudolandmarks",
+    "landmark_reference_pt_dist": "plantcv.plantcv.homology.landmark_reference_pt_dist",
+    "scale_features": "plantcv.plantcv.homology.scale_features",
+}
+
+
+class _HomologyModule(_ModuleType):
+    """Homology package that keeps function names bound to the functions when their submodules are imported."""
+
+    def __setattr__(self, name, value):
+        # Importing a submodule binds it as a package attribute of the same name (e.g. homology.space),
+        # bind the function defined in it instead
+        if name in _LAZY_FUNCTIONS and isinstance(value, _ModuleType) and value.__name__ == _LAZY_FUNCTIONS[name]:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+def __getattr__(name):
+    """Import a homology function from its submodule the first time it is accessed."""
+    if name in _LAZY_FUNCTIONS:
+        func = getattr(_import_module(_LAZY_FUNCTIONS[name]), name)
+        globals()[name] = func
+        return func
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    """List the package attributes, including the lazily imported homology functions."""
+    return sorted(set(globals()) | set(_LAZY_FUNCTIONS))
+
+
+_sys.modules[__name__].__class__ = _HomologyModule
 
 __all__ = ["acute", "space", "starscape", "constella", "constellaqc", "x_axis_pseudolandmarks", "y_axis_pseudolandmarks",
            "landmark_reference_pt_dist", "scale_features"]
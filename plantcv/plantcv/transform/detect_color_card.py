@@ -4,52 +4,113 @@ Algorithm written by mtwatso2-eng (github). Updated and implemented into PlantCV
 """
 import os
 import cv2
-import math
 import numpy as np
 from plantcv.plantcv import params, outputs, fatal_error
 from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._helpers import _cv2_findcontours
 
 
-def _is_square(contour, min_size):
+def _is_square(area, rect):
     """Determine if a contour is square or not.
 
     Parameters
     ----------
-    contour : list
-        OpenCV contour.
+    area : float
+        Contour area.
+    rect : tuple
+        Minimum area rectangle of the contour.
 
     Returns
     -------
     bool
         True if the contour is square, False otherwise.
     """
-    return (cv2.contourArea(contour) > min_size and
-            max(cv2.minAreaRect(contour)[1]) / min(cv2.minAreaRect(contour)[1]) < 1.27 and
-            (cv2.contourArea(contour) / np.prod(cv2.minAreaRect(contour)[1])) > 0.8)
+    width, height = rect[1]
+    return max(width, height) / min(width, height) < 1.27 and (area / (width * height)) > 0.8
 
 
-def _get_contour_sizes(contours):
-    """Get the shape and size of all contours.
+def _find_squares(contours, min_size):
+    """Find square-shaped contours.
 
     Parameters
     ----------
     contours : list
         List of OpenCV contours.
+    min_size : int
+        Minimum contour area.
 
     Returns
     -------
     list
-        Contour areas, widths, and heights.
+        Square contours, their areas, and their minimum area rectangles.
     """
-    # Initialize chip shape lists
-    marea, mwidth, mheight = [], [], []
+    squares, areas, rects = [], [], []
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        # Only calculate the minimum area rectangle of contours that are large enough
+        if area > min_size:
+            rect = cv2.minAreaRect(contour)
+            if _is_square(area, rect):
+                squares.append(contour)
+                areas.append(area)
+                rects.append(rect)
+    return squares, np.array(areas, dtype=np.float64), rects
+
+
+def _get_contour_sizes(rects):
+    """Get the width and height of all contours.
+
+    Parameters
+    ----------
+    rects : list
+        Minimum area rectangles of the contours.
+
+    Returns
+    -------
+    list
+        Contour widths and heights.
+    """
+    # Initialize chip shape arrays
+    mwidth = np.empty(len(rects))
+    mheight = np.empty(len(rects))
     # Loop over our contours and size data about them
-    for cnt in contours:
-        marea.append(cv2.contourArea(cnt))
-        _, wh, _ = cv2.minAreaRect(cnt)  # Rotated rectangle
-        mwidth.append(wh[0])
-        mheight.append(wh[1])
-    return marea, mwidth, mheight
+    for i, (_, wh, _) in enumerate(rects):  # Rotated rectangle
+        mwidth[i], mheight[i] = wh
+    return mwidth, mheight
+
+
+def _get_chip_centers(corners, nrows, ncols):
+    """Map a regular grid of chip centers onto the corners of a color card.
+
+    Parameters
+    ----------
+    corners : numpy.ndarray
+        Corners of the color card, ordered starting from the white chip corner.
+    nrows : int
+        Number of chip rows.
+    ncols : int
+        Number of chip columns.
+
+    Returns
+    -------
+    numpy.ndarray
+        Chip centers (x, y) in image coordinates, ordered row by row.
+    """
+    # Increment amount is arbitrary, cell distances rescaled during perspective transform
+    increment = 100
+    # Grid of chip centers (x, y), ordered row by row
+    rows, cols = np.mgrid[:nrows, :ncols]
+    centers = (np.stack([cols.ravel(), rows.ravel()], axis=1) * increment).astype(np.float32)
+
+    # Find the minimum area rectangle of the chip centers
+    new_rect = cv2.minAreaRect(centers)
+    # Get the corners of the rectangle
+    box_points = cv2.boxPoints(new_rect).astype("float32")
+    # Calculate the perspective transform matrix from the minimum area rectangle
+    m_transform = cv2.getPerspectiveTransform(box_points, corners.astype("float32"))
+    # Transform the chip centers using the perspective transform matrix
+    new_centers = cv2.perspectiveTransform(centers.reshape(-1, 1, 2), m_transform)
+    return np.rint(new_centers.reshape(-1, 2)).astype(np.int32)
 
 
 def _draw_color_chips(rgb_img, new_centers, radius):
@@ -73,10 +134,13 @@ def _draw_color_chips(rgb_img, new_centers, radius):
     labeled_mask = np.zeros(rgb_img.shape[0:2])
     debug_img = np.copy(rgb_img)
 
-    # Loop over the new chip centers and draw them on the RGB image and labeled mask
+    # Loop over the new chip centers and draw them on the labeled mask
+    for i, pt in enumerate(new_centers):
+        cv2.circle(labeled_mask, pt, radius, (i + 1) * 10, -1)
+    # Paint all chips onto the RGB image at once using the labeled mask
+    debug_img[labeled_mask > 0] = (255, 255, 0)
+    # Label each chip on the RGB image
     for i, pt in enumerate(new_centers):
-        cv2.circle(labeled_mask, new_centers[i], radius, (i + 1) * 10, -1)
-        cv2.circle(debug_img, new_centers[i], radius, (255, 255, 0), -1)
         cv2.putText(debug_img, text=str(i), org=pt, fontScale=params.text_size, color=(0, 0, 0),
                     fontFace=cv2.FONT_HERSHEY_SIMPLEX, thickness=params.text_thickness)
     return labeled_mask, debug_img
@@ -123,53 +187,50 @@ def detect_color_card(rgb_img, label=None, **kwargs):
     nrows = 6
     ncols = 4
 
-    # Convert to grayscale, threshold, and findContours
-    imgray = cv2.cvtColor(rgb_img, cv2.COLOR_BGR2GRAY)
-    gaussian = cv2.GaussianBlur(imgray, (11, 11), 0)
-    thresh = cv2.adaptiveThreshold(gaussian, 255, adaptive_method,
-                                   cv2.THRESH_BINARY_INV, block_size, 2)
-    contours, _ = cv2.findContours(thresh, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    # Convert to grayscale, blur, and threshold, reusing a single image buffer for each step
+    thresh = cv2.cvtColor(rgb_img, cv2.COLOR_BGR2GRAY)
+    cv2.GaussianBlur(thresh, (11, 11), 0, dst=thresh)
+    cv2.adaptiveThreshold(thresh, 255, adaptive_method, cv2.THRESH_BINARY_INV, block_size, 2, dst=thresh)
+    # Find contours (chips are holes inside the card so all contours are needed, but not their hierarchy)
+    contours, _ = _cv2_findcontours(bin_img=thresh, mode=cv2.RETR_LIST, method=cv2.CHAIN_APPROX_SIMPLE)
 
     # Filter contours, keep only square-shaped ones
-    filtered_contours = [contour for contour in contours if _is_square(contour, min_size)]
+    filtered_contours, marea, rects = _find_squares(contours, min_size)
     # Calculate median area of square contours
-    target_square_area = np.median([cv2.contourArea(cnt) for cnt in filtered_contours])
+    target_square_area = np.median(marea)
     # Filter contours again, keep only those within 20% of median area
-    filtered_contours = [contour for contour in filtered_contours if
-                         (0.8 < (cv2.contourArea(contour) / target_square_area) < 1.2)]
+    area_ratios = marea / target_square_area
+    keep = np.flatnonzero((area_ratios > 0.8) & (area_ratios < 1.2))
+    filtered_contours = [filtered_contours[i] for i in keep]
+    marea = marea[keep]
+    rects = [rects[i] for i in keep]
 
     # Throw a fatal error if no color card found
     if len(filtered_contours) == 0:
         fatal_error('No color card found')
 
-    # Initialize chip shape lists
-    marea, mwidth, mheight = _get_contour_sizes(filtered_contours)
+    # Chip shape arrays
+    mwidth, mheight = _get_contour_sizes(rects)
 
-    # Create dataframe for easy summary stats
+    # Median chip size summary stats
     chip_size = np.median(marea)
     chip_height = np.median(mheight)
     chip_width = np.median(mwidth)
 
-    # Concatenate all contours into one array and find the minimum area rectangle
-    rect = np.concatenate([[np.array(cv2.minAreaRect(i)[0]).astype(int)] for i in filtered_contours])
-    rect = cv2.minAreaRect(rect)
+    # Gather the (truncated) centers of all chips into one array and find the minimum area rectangle
+    chip_centers = np.empty((len(rects), 2), dtype=np.int32)
+    for i, r in enumerate(rects):
+        chip_centers[i] = r[0]
+    rect = cv2.minAreaRect(chip_centers)
     # Get the corners of the rectangle
     corners = np.array(np.intp(cv2.boxPoints(rect)))
     # Determine which corner most likely contains the white chip
-    white_index = np.argmin([np.mean(math.dist(rgb_img[corner[1], corner[0], :], (255, 255, 255))) for corner in corners])
-    corners = corners[np.argsort([math.dist(corner, corners[white_index]) for corner in corners])[[0, 1, 3, 2]]]
-    # Increment amount is arbitrary, cell distances rescaled during perspective transform
-    increment = 100
-    centers = [[int(0 + i * increment), int(0 + j * increment)] for j in range(nrows) for i in range(ncols)]
-
-    # Find the minimum area rectangle of the chip centers
-    new_rect = cv2.minAreaRect(np.array(centers))
-    # Get the corners of the rectangle
-    box_points = cv2.boxPoints(new_rect).astype("float32")
-    # Calculate the perspective transform matrix from the minimum area rectangle
-    m_transform = cv2.getPerspectiveTransform(box_points, corners.astype("float32"))
-    # Transform the chip centers using the perspective transform matrix
-    new_centers = cv2.transform(np.array([centers]), m_transform)[0][:, 0:2]
+    corner_pixels = rgb_img[corners[:, 1], corners[:, 0]].astype(np.int16)
+    white_index = np.argmin(np.linalg.norm(corner_pixels - 255, axis=1))
+    # Order the corners by (squared) distance from the white corner
+    corners = corners[np.argsort(np.sum((corners - corners[white_index]) ** 2, axis=1))[[0, 1, 3, 2]]]
+    # Map the grid of chip centers onto the color card
+    new_centers = _get_chip_centers(corners, nrows, ncols)
 
     # Create labeled mask and debug image of color chips
     labeled_mask, debug_img = _draw_color_chips(rgb_img, new_centers, radius)
@@ -2,6 +2,7 @@
 import cv2
 from plantcv.plantcv import outputs
 from plantcv.plantcv.analyze import distribution as analyze_distribution
+from plantcv.plantcv.analyze.distribution import _analyze_distribution
 
 
 def test_distribution(test_data):
@@ -14,3 +15,16 @@ def test_distribution(test_data):
     _ = analyze_distribution(labeled_mask=mask, n_labels=1, direction="across", hist_range="relative")
     print(outputs.observations)
     assert int(outputs.observations['default_1']['x_distribution_mean']['value']) == 130
+
+
+def test_analyze_distribution_returns_img(test_data):
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    # Read in test data
+    mask = cv2.imread(test_data.small_bin_fill, -1)
+    img = mask.copy()
+
+    # The mask passed by _iterate_analysis is a reused buffer and must not be returned
+    out = _analyze_distribution(img=img, mask=mask, label="default")
+    assert out is img
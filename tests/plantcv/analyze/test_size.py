@@ -85,3 +85,13 @@ def test_size_small_contour(test_data):
     mask = cv2.drawContours(mask, obj_contour, -1, (255), thickness=-1)
     _ = analyze_size(img=img, labeled_mask=mask, n_labels=1)
     assert "defaults" not in outputs.observations
+
+
+def test_size_transposed_grayscale():
+    """Test for PlantCV."""
+    # Non-contiguous (transposed) grayscale image
+    img = np.full((120, 100), 100, dtype=np.uint8).T
+    mask = np.zeros((100, 120), dtype=np.uint8)
+    cv2.circle(mask, (60, 50), 20, 255, -1)
+    analysis_image = analyze_size(img=img, labeled_mask=mask, n_labels=1)
+    assert analysis_image.shape == (100, 120, 3)
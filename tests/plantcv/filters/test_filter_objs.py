@@ -1,9 +1,14 @@
+import sys
 import cv2
+import numpy as np
 import pytest
 from plantcv.plantcv import params
 from plantcv.plantcv.filters import obj_props
 from plantcv.plantcv import create_labels
 
+# obj_props module (the package attribute of the same name is the function)
+obj_props_module = sys.modules["plantcv.plantcv.filters.obj_props"]
+
 
 def test_filter_objs_upper_na(filters_test_data):
     """Test for PlantCV."""
@@ -16,6 +21,25 @@ def test_filter_objs_upper_na(filters_test_data):
     assert nobjs == 20
 
 
+def test_filter_objs_area_2d_binary(filters_test_data):
+    """Test for PlantCV."""
+    # Read in test data
+    mask = cv2.imread(filters_test_data.barley_example, -1)
+    filtered_mask = obj_props(bin_img=mask, thresh=500)
+    _, nobjs = create_labels(mask=filtered_mask)
+    assert nobjs == 20
+
+
+def test_filter_objs_area_multivalued():
+    """Test for PlantCV."""
+    # Touching regions with different values are separate objects, as in skimage.measure.label
+    mask = np.zeros((100, 100), dtype=np.uint8)
+    mask[10:50, 10:30] = 128
+    mask[10:50, 30:90] = 255
+    filtered_mask = obj_props(bin_img=mask, thresh=1000)
+    assert np.count_nonzero(filtered_mask) == 2400
+
+
 def test_filter_objs_lower_thresh(filters_test_data):
     """Test for PlantCV."""
     # Read in test data
@@ -25,6 +49,41 @@ def test_filter_objs_lower_thresh(filters_test_data):
     assert nobjs == 11
 
 
+def test_filter_objs_eccentricity(filters_test_data):
+    """Test for PlantCV."""
+    # Read in test data
+    mask = cv2.imread(filters_test_data.barley_example, -1)
+    filtered_mask = obj_props(bin_img=mask, cut_side="lower", thresh=0.98, regprop="eccentricity")
+    _, nobjs = create_labels(mask=filtered_mask)
+    assert nobjs == 9
+
+
+def test_filter_objs_cached_measurements(filters_test_data, monkeypatch):
+    """Test for PlantCV."""
+    # Count the uncached labeling and measurement calls, starting from an empty cache
+    calls = []
+    measure_objs_uncached = obj_props_module._measure_objs_uncached
+
+    def _spy(bin_img, regprop):
+        calls.append(regprop)
+        return measure_objs_uncached(bin_img, regprop)
+
+    monkeypatch.setattr(obj_props_module, "_measure_objs_uncached", _spy)
+    monkeypatch.setattr(obj_props_module, "_measure_cache", {"key": None, "results": {}})
+    # Read in test data
+    mask = cv2.imread(filters_test_data.barley_example, -1)
+    # Repeated calls on the same image reuse the cached measurements
+    _ = obj_props(bin_img=mask, thresh=0)
+    filtered_mask = obj_props(bin_img=mask, thresh=20000)
+    assert calls == ["area"]
+    # A different image is labeled and measured again
+    _ = obj_props(bin_img=filtered_mask, thresh=20000)
+    assert calls == ["area", "area"]
+    # A different property of the same image is measured again
+    _ = obj_props(bin_img=filtered_mask, cut_side="lower", thresh=0.98, regprop="eccentricity")
+    assert calls == ["area", "area", "eccentricity"]
+
+
 def test_bad_params(filters_test_data):
     """PlantCV Test"""
     mask = cv2.imread(filters_test_data.barley_example)
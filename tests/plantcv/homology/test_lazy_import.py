@@ -0,0 +1,20 @@
+import importlib
+from plantcv.plantcv.homology.constellaqc import constellaqc
+from plantcv.plantcv import homology
+
+
+def test_homology_functions_after_submodule_import():
+    """Test for PlantCV."""
+    # Importing a submodule directly must not replace the package function of the same name
+    importlib.import_module("plantcv.plantcv.homology.space")
+    assert callable(homology.space) and homology.constellaqc is constellaqc
+
+
+def test_homology_set_function(monkeypatch):
+    """Test for PlantCV."""
+    # Package functions can be replaced (e.g. mocked)
+    def _mock(**kwargs):
+        return kwargs
+
+    monkeypatch.setattr(homology, "acute", _mock)
+    assert homology.acute is _mock
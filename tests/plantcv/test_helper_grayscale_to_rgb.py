@@ -1,4 +1,5 @@
 import cv2
+import numpy as np
 from plantcv.plantcv._helpers import _grayscale_to_rgb
 
 
@@ -7,3 +8,10 @@ def test_grayscale_to_rgb(test_data):
     img = cv2.imread(test_data.small_gray_img, -1)
     img = _grayscale_to_rgb(img=img)
     assert len(img.shape) == 3
+
+
+def test_grayscale_to_rgb_read_only(test_data):
+    """Test for PlantCV."""
+    gray_img = cv2.imread(test_data.small_gray_img, -1)
+    img = _grayscale_to_rgb(img=gray_img, writable=False)
+    assert np.array_equal(img, cv2.cvtColor(gray_img, cv2.COLOR_GRAY2BGR)) and not img.flags.writeable
@@ -20,3 +20,12 @@ def test_object_composition_nested():
     cnt_str = np.array([[[-1, -1,  1, -1], [-1, -1, -1,  0]]], dtype=np.int32)
     contours = _object_composition(contours=cnt, hierarchy=cnt_str)
     assert contours is not None
+
+
+def test_object_composition_single():
+    """Test for PlantCV."""
+    # Create test data
+    cnt = [np.array([[[25, 25]], [[25, 49]], [[49, 49]], [[49, 25]]], dtype=np.int32)]
+    cnt_str = np.array([[[-1, -1, -1, -1]]], dtype=np.int32)
+    contours = _object_composition(contours=cnt, hierarchy=cnt_str)
+    assert np.array_equal(contours, cnt[0])
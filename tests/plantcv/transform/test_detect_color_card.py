@@ -1,9 +1,13 @@
 """Tests for detect_color_card."""
 import cv2
 import pytest
+import sys
 import numpy as np
 from plantcv.plantcv.transform import detect_color_card
 
+# detect_color_card module (the package attribute of the same name is the function)
+dcc_module = sys.modules["plantcv.plantcv.transform.detect_color_card"]
+
 
 def test_detect_color_card(transform_test_data):
     """Test for PlantCV."""
@@ -27,3 +31,36 @@ def test_detect_color_card_incorrect_block_size(transform_test_data):
     rgb_img = cv2.imread(transform_test_data.colorcard_img)
     with pytest.raises(RuntimeError):
         _ = detect_color_card(rgb_img=rgb_img, block_size=2)
+
+
+def test_detect_color_card_corner_chips(transform_test_data, monkeypatch):
+    """Test for PlantCV."""
+    # Load rgb image and rotate/scale it so the card corners are not axis aligned
+    rgb_img = cv2.imread(transform_test_data.colorcard_img)
+    height, width = rgb_img.shape[:2]
+    rotation = cv2.getRotationMatrix2D((width / 2, height / 2), 20, 0.8)
+    rgb_img = cv2.warpAffine(rgb_img, rotation, (width, height))
+    # Record the detected card corners passed to the chip center mapping
+    detected = {}
+    get_chip_centers = dcc_module._get_chip_centers
+
+    def _spy(corners, nrows, ncols):
+        detected["corners"] = corners
+        return get_chip_centers(corners, nrows, ncols)
+
+    monkeypatch.setattr(dcc_module, "_get_chip_centers", _spy)
+    labeled_mask = detect_color_card(rgb_img=rgb_img, adaptive_method=0)
+    # The four corner chips are centered on the detected card corners
+    for chip in (10, 40, 210, 240):
+        center = np.argwhere(labeled_mask == chip).mean(axis=0)[::-1]
+        assert np.min(np.linalg.norm(detected["corners"] - center, axis=1)) <= 1
+
+
+def test_get_chip_centers():
+    """Test for PlantCV."""
+    # Corners of a card seen in perspective (not a parallelogram)
+    corners = np.array([[100, 100], [400, 120], [380, 600], [90, 560]])
+    centers = dcc_module._get_chip_centers(corners, nrows=6, ncols=4)
+    # The corner chips are mapped onto the card corners
+    for center in centers[[0, 3, 20, 23]]:
+        assert np.min(np.linalg.norm(corners - center, axis=1)) <= 1